@@ -2,7 +2,11 @@
 # Calculates optimal security delay (inactive lifetime) for a given timeout-tree (TT) with given input parameters, and calculates efficiency metrics given that security delay
 
 # Usage:
-# python3 tt_analysis.py -n YY
+# python3 tt_analysis.py -n YY [-j JOBS]
+# (if the optional numba package is installed, the numeric core is compiled to machine code and rows are analyzed in parallel; otherwise it runs as plain Python)
+# (if the optional numpy package is installed, all rows are analyzed at once using arrays; otherwise rows are analyzed one at a time)
+# (for the fastest plain Python run, use PyPy: pypy3 tt_analysis.py -n YY; numpy is not used under PyPy)
+# (with -j JOBS, rows are split among JOBS worker processes, each using one numba thread, which only pays off for input files with many rows)
 # Reads input parameters from file in_tt_analysisYY.csv
 #     Row 1 (fixed parameter names): Ac,Ro,AS,MS
 #     Row 2 (fixed parameter values): Ac_value,Ro_value,AS_value,MS_value
@@ -41,114 +45,267 @@
 #    Note: If TT leaves use hierarchical channels, funder is able to use their capital to route payments unrelated to the leaf's casual user, thus reducing the cost of capital
 
 # e(x) = Expected cost per leaf for putting all Le leaves of all TTs onchain as a function of x is:
-#    Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE*x) + Pr*AS*calc_feerate(Fe, Ex, x)
-# Expected cost is minimized by using binary search to minimize e(x) based on its derivative e'(x) where e'(x) is:
-#    -Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE*(x**2)) + Pr*AS*calc_feerate_derivative(Fe, Ex, x)
+#    Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE*x) + Pr*AS*Fe/(1-x)**Ex
+# Expected cost is minimized by using Newton's method to find the root of its derivative e'(x) where e'(x) is:
+#    -Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE*(x**2)) + Pr*AS*Fe*Ex/(1-x)**(Ex+1)
+# e'(x) = 0 is equivalent to 2*log(x) - (Ex+1)*log(1-x) = log(Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE*Pr*AS*Fe*Ex)),
+#    whose left side is increasing and convex in log(x)
 
 import sys
-import math
+from math import pow as _pow, log as _log, log1p as _log1p, exp as _exp, ceil as _ceil	# local names avoid attribute lookups in _solve
 import argparse
 import csv
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, lru_cache
+
+try:
+    from numba import njit, prange, set_num_threads	# optional: compiles the numeric core to machine code when available
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    def njit(*args, **kwargs):				# fallback: run the numeric core as plain Python
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+NUMPY_AVAILABLE = False
+if sys.implementation.name != 'pypy':			# under PyPy the plain Python path is JIT-compiled, and numpy (through cpyext) would only slow it down
+    try:
+        import numpy as np				# optional: analyzes all dynamic parameter rows at once when available
+        NUMPY_AVAILABLE = True
+    except ImportError:
+        pass
 
 # Constants:
 BLOCKSIZE = 4000000					# blocksize (in vbytes)
 BLOCKS_PER_YEAR = 144*365.25				# number of blocks per year (on average)
 SATOSHIS_PER_BITCOIN = 100000000			# number of satoshis per bitcoin
-LOG_PRECISION = 50					# parameter that gives the number of binary search iterations in calculating the optimal value of x, where x is the fraction of each block used for putting TT leaves onchain
-
-def calc_feerate(Fe, Ex, x):				# x is fraction of blocks used by TT leaves
-    return(Fe / (1.0 - x)**Ex)
-
-def calc_feerate_derivative(Fe, Ex, x):			# derivative of feerate with respect to x, where x is fraction of blocks used by TT leaves
-    return(Fe * Ex / (1.0 - x)**(Ex+1))
+LOG_PRECISION = 50					# parameter that gives the maximum number of Newton iterations in calculating the optimal value of x, where x is the fraction of each block used for putting TT leaves onchain
+MIN_ONE_MINUS_X = 2.0**-LOG_PRECISION			# smallest allowed value of 1-x, which keeps x (and the feerate) well-defined when max onchain fees barely bound x
 
-def analyze_tt(static_params, dynamic_params, out_csv):
+def parse_static_params(static_params):		# converts and checks the fixed parameters
     Ac = int(static_params[0])
     Ro = int(static_params[1])
     AS = int(static_params[2])
     MS = int(static_params[3])
+    assert Ac >= 0.0
+    assert Ro >= 0.0
+    assert AS >= 0.0
+    assert MS >= AS
+    return((Ac, Ro, AS, MS))
+
+def parse_params(static_params, dynamic_params):	# converts and checks the fixed parameters and one row of dynamic parameters
+    Ac, Ro, AS, MS = parse_static_params(static_params)
     Fe = float(dynamic_params[0])
     Ex = float(dynamic_params[1])
     Pr = float(dynamic_params[2])
     Le = int(dynamic_params[3])
     Va = int(dynamic_params[4])
     Co = float(dynamic_params[5])
-    assert Ac >= 0.0
-    assert Ro >= 0.0
-    assert AS >= 0.0
-    assert MS >= AS
     assert Fe >= 0.0
     assert Ex > 0.0
     assert 0.0 <= Pr <= 1.0
-    assert Le >= 0.0
+    assert Le > 0					# funds and delays are per leaf, so there must be at least one leaf
     assert Va >= 0.0
     assert 0.0 <= Co <= 1.0
+    assert Co > 0.0 or Pr*Fe == 0.0			# with no cost of capital but a positive expected fee, expected cost has no minimum (it decreases as x goes to 0)
     cuf = 2.0 * Va * SATOSHIS_PER_BITCOIN / (3.0 * Le)	# casual user's funds per leaf
     assert cuf > MS*Fe					# casual user's funds per leaf must be more than the maximum fee when fees are not increased due to congestion from TT leaves
-    low_x = 0.0						# lower bound on allowable x value
-    high_x = 1.0					# upper bound on allowable x value
-    for i in range(LOG_PRECISION):			# first, determine largest x value for which max onchain fees do not exceed casual user's funds per leaf
-        x = (low_x + high_x) / 2.0
-        max_fee = MS*calc_feerate(Fe, Ex, x)
-        if (max_fee > cuf):
-            high_x = x
-        else:
-            low_x = x
-    low_x = 0.0
-    high_x = x
-    for i in range(LOG_PRECISION):			# next, determine value of x that minimizes expected cost, subject to constraint that max onchain fees do not exceed casual user's funds per leaf
-        x = (low_x + high_x) / 2.0
-        exp_cost = Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE*x) + Pr*AS*calc_feerate(Fe, Ex, x)
-        exp_cost_deriv = -Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE*(x**2)) + Pr*AS*calc_feerate_derivative(Fe, Ex, x)
-        if (exp_cost_deriv > 0.0):
-            high_x = x
-        else:
-            low_x = x
-    max_fee = MS*calc_feerate(Fe, Ex, x)
+    return((Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co))
+
+def analyze_tt(static_params, dynamic_params):		# returns the output row (dynamic parameters followed by output metrics) for one row of dynamic parameters
+    params = parse_params(static_params, dynamic_params)
+    results = _solve_cached(*params)
+    return(list(params[4:]) + list(results))
+
+def analyze_tt_batch(static_params, dynamic_params_array):	# same as calling analyze_tt on each row of the (rows x 6) string array dynamic_params_array, but with the conversions, checks and numeric work done on NumPy arrays
+    if len(dynamic_params_array) == 0:
+        return([])
+    Ac, Ro, AS, MS = parse_static_params(static_params)
+    Fe, Ex, Pr, Co = dynamic_params_array[:, [0, 1, 2, 5]].astype(float).T
+    Le_int, Va_int = dynamic_params_array[:, [3, 4]].astype(np.int64).T	# accepts the same strings as int() in parse_params
+    Le = Le_int.astype(float)
+    Va = Va_int.astype(float)
+    assert np.all(Fe >= 0.0)				# same checks as parse_params
+    assert np.all(Ex > 0.0)
+    assert np.all((0.0 <= Pr) & (Pr <= 1.0))
+    assert np.all(Le > 0.0)
+    assert np.all(Va >= 0.0)
+    assert np.all((0.0 <= Co) & (Co <= 1.0))
+    assert np.all((Co > 0.0) | (Pr*Fe == 0.0))
+    cuf = 2.0 * Va * SATOSHIS_PER_BITCOIN / (3.0 * Le)
+    assert np.all(cuf > MS*Fe)
+    if NUMBA_AVAILABLE:
+        out = np.empty((len(Fe), 9))
+        _solve_batch_parallel(Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co, out)
+        results = list(out.T)
+        results[1] = results[1].astype(np.int64)	# security delay (in blocks) is an integer
+    else:
+        results = list(_solve_batch(Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co))
+    columns = [Fe, Ex, Pr, Le_int, Va_int, Co] + results
+    return([list(row) for row in zip(*[column.tolist() for column in columns])])
+
+def analyze_rows(static_params, dynamic_params_list):	# returns the output rows for a list of rows of dynamic parameters (a string array if numpy is available)
+    if NUMPY_AVAILABLE:
+        return(analyze_tt_batch(static_params, dynamic_params_list))
+    return([analyze_tt(static_params, dynamic_params) for dynamic_params in dynamic_params_list])
+
+def init_worker():					# runs in each -j worker process; limits numba to one thread per worker, so -j JOBS uses JOBS threads in total rather than JOBS times the number of cores
+    if NUMBA_AVAILABLE:
+        set_num_threads(1)
+
+def write_rows(out_f, rows):				# writes rows of numbers in the same format as csv.writer, but with a single write
+    out_f.write(''.join([','.join([str(value) for value in row]) + '\r\n' for row in rows]))
+
+@njit(cache=True)
+def _solve(Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co):	# numeric core of analyze_tt; returns the 9 output metrics for one row
+    cuf = 2.0 * Va * SATOSHIS_PER_BITCOIN / (3.0 * Le)	# casual user's funds per leaf
+    one_minus_high_x = max(_pow(MS*Fe/cuf, 1.0/Ex), MIN_ONE_MINUS_X)	# first, determine largest x value for which max onchain fees MS*Fe/(1-x)^Ex do not exceed casual user's funds per leaf
+    high_x = 1.0 - one_minus_high_x			# (1-x is kept separately, as 1.0 - high_x loses precision when high_x is close to 1)
+    capcost_coef = Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE)	# e(x) = capcost_coef/x + fee_coef/(1-x)^Ex
+    fee_coef = Pr*AS*Fe
+    deriv_exponent = Ex + 1.0				# exponent of (1-x) in the feerate derivative
+    x = high_x
+    one_minus_x = one_minus_high_x
+    exp_cost_deriv = -capcost_coef/(x*x) + fee_coef*Ex/_pow(one_minus_x, deriv_exponent)
+    if (exp_cost_deriv > 0.0):				# otherwise expected cost decreases all the way to high_x, so the constraint binds and x = high_x
+        log_k = _log(capcost_coef) - _log(fee_coef*Ex)	# next, determine value of x that minimizes expected cost by solving e'(x) = 0 for y = log(x)
+        y = _log(high_x)
+        for i in range(LOG_PRECISION):			# g(y) = 2*y - (Ex+1)*log(1-x) - log_k is increasing and convex, so Newton's method started at log(high_x) decreases monotonically to its root
+            x = min(_exp(y), high_x)
+            g = 2.0*y - deriv_exponent*_log1p(-x) - log_k
+            if (g <= 0.0):				# e'(x) <= 0, so expected cost is minimized at x
+                break
+            next_y = y - g / (2.0 + deriv_exponent*x/(1.0-x))
+            if (next_y >= y):				# converged to floating-point precision
+                break
+            y = next_y
+        x = min(_exp(y), high_x)
+        if (x < high_x):
+            one_minus_x = 1.0 - x
+    feerate = Fe / _pow(one_minus_x, Ex)		# feerate at the chosen x, shared by max and average fees
+    max_fee = MS*feerate
     onchain_fee_fraction = max_fee / cuf
-    ave_fee = AS*calc_feerate(Fe, Ex, x)
+    ave_fee = AS*feerate
     expected_fee = Pr*ave_fee
-    security_delay_blocks = int(math.ceil(Le*AS/(BLOCKSIZE*x)))
+    security_delay_blocks = int(_ceil(Le*AS/(BLOCKSIZE*x)))
     security_delay_years = float(security_delay_blocks) / BLOCKS_PER_YEAR
     capital_cost = Va*SATOSHIS_PER_BITCOIN*Co*security_delay_blocks/(BLOCKS_PER_YEAR*Le)
     expected_cost = capital_cost + expected_fee
     capital_efficiency = (2.0/3.0) * Ac / (Ac + Ro + security_delay_blocks)
     expected_overhead_fraction = (capital_cost + expected_fee) / cuf
-    out_csv.writerow([Fe,Ex,Pr,Le,Va,Co,x,security_delay_blocks,security_delay_years,capital_cost,capital_efficiency,max_fee,onchain_fee_fraction,expected_fee,expected_overhead_fraction])
+    return((x, security_delay_blocks, security_delay_years, capital_cost, capital_efficiency, max_fee, onchain_fee_fraction, expected_fee, expected_overhead_fraction))
+
+@lru_cache(maxsize=None)
+def _solve_cached(Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co):	# _solve, remembering results for rows that repeat (e.g. in parameter sweeps)
+    return(_solve(Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co))
+
+@njit(cache=True, parallel=True)
+def _solve_batch_parallel(Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co, out):	# version of _solve_batch for numba, which runs _solve on each row across all cores and stores its output metrics in row of out
+    for i in prange(len(Fe)):
+        (out[i, 0], out[i, 1], out[i, 2], out[i, 3], out[i, 4], out[i, 5], out[i, 6], out[i, 7], out[i, 8]) = _solve(Ac, Ro, AS, MS, Fe[i], Ex[i], Pr[i], Le[i], Va[i], Co[i])
+
+def _solve_batch(Ac, Ro, AS, MS, Fe, Ex, Pr, Le, Va, Co):	# version of _solve where Fe, Ex, Pr, Le, Va and Co are arrays with one entry per row
+    cuf = 2.0 * Va * SATOSHIS_PER_BITCOIN / (3.0 * Le)
+    one_minus_high_x = np.maximum((MS*Fe/cuf)**(1.0/Ex), MIN_ONE_MINUS_X)
+    high_x = 1.0 - one_minus_high_x
+    capcost_coef = Va*SATOSHIS_PER_BITCOIN*Co*AS/(BLOCKS_PER_YEAR*BLOCKSIZE)
+    fee_coef = Pr*AS*Fe
+    deriv_exponent = Ex + 1.0
+    exp_cost_deriv = -capcost_coef/(high_x*high_x) + fee_coef*Ex/one_minus_high_x**deriv_exponent
+    unconstrained = exp_cost_deriv > 0.0		# rows where the constraint does not bind
+    active = unconstrained.copy()			# rows whose Newton iteration has not yet stopped
+    y = np.log(high_x)
+    log_k = np.full_like(y, np.inf)			# +inf when fee_coef is 0 (such rows are never active)
+    has_fee = fee_coef > 0.0
+    log_k[has_fee] = np.log(capcost_coef[has_fee]) - np.log(fee_coef[has_fee]*Ex[has_fee])
+    x = np.empty_like(y)				# work arrays for the Newton iteration, updated in place to avoid temporaries
+    g = np.empty_like(y)
+    step = np.empty_like(y)
+    next_y = np.empty_like(y)
+    for i in range(LOG_PRECISION):
+        if not active.any():
+            break
+        np.exp(y, out=x)
+        np.minimum(x, high_x, out=x)
+        np.negative(x, out=g)				# g = 2*y - (Ex+1)*log(1-x) - log_k
+        np.log1p(g, out=g)
+        np.multiply(deriv_exponent, g, out=g)
+        np.multiply(y, 2.0, out=next_y)
+        np.subtract(next_y, g, out=g)
+        np.subtract(g, log_k, out=g)
+        np.multiply(deriv_exponent, x, out=step)	# step = g / (2 + (Ex+1)*x/(1-x))
+        np.subtract(1.0, x, out=next_y)
+        np.divide(step, next_y, out=step)
+        np.add(2.0, step, out=step)
+        np.divide(g, step, out=step)
+        np.subtract(y, step, out=next_y)
+        active &= (g > 0.0) & (next_y < y)
+        np.copyto(y, next_y, where=active)
+    x = np.where(unconstrained, np.minimum(np.exp(y), high_x), high_x)
+    assert np.all(np.isfinite(x) & (0.0 < x) & (x < 1.0))	# a NaN or inf would otherwise look like a converged row
+    one_minus_x = np.where(x < high_x, 1.0 - x, one_minus_high_x)
+    feerate = Fe / one_minus_x**Ex
+    max_fee = MS*feerate
+    onchain_fee_fraction = max_fee / cuf
+    ave_fee = AS*feerate
+    expected_fee = Pr*ave_fee
+    security_delay_blocks = np.ceil(Le*AS/(BLOCKSIZE*x)).astype(np.int64)
+    security_delay_years = security_delay_blocks / BLOCKS_PER_YEAR
+    capital_cost = Va*SATOSHIS_PER_BITCOIN*Co*security_delay_blocks/(BLOCKS_PER_YEAR*Le)
+    capital_efficiency = (2.0/3.0) * Ac / (Ac + Ro + security_delay_blocks)
+    expected_overhead_fraction = (capital_cost + expected_fee) / cuf
+    return((x, security_delay_blocks, security_delay_years, capital_cost, capital_efficiency, max_fee, onchain_fee_fraction, expected_fee, expected_overhead_fraction))
 
 # Main program
-parser = argparse.ArgumentParser(description='Analyze timeout-tree security delays and efficiency metrics')
-parser.add_argument('-n', dest='number', action='store', default='00', help='number portion of i/o file names')
-args = parser.parse_args()
-in_file_name = 'in_tt_analysis' + args.number + '.csv'
-out_file_name = 'out_tt_analysis' + args.number + '.csv'
-with open(in_file_name) as in_f:
-    in_csv = csv.reader(in_f)
-    static_headers = next(in_csv)
-    expected_static_headers = ['Ac','Ro','AS','MS']
-    assert expected_static_headers == static_headers
-    static_params = next(in_csv)
-    dynamic_headers = next(in_csv)
-    expected_dynamic_headers = ['Fe','Ex','Pr','Le','Va','Co']
-    assert expected_dynamic_headers == dynamic_headers
-    with open(out_file_name, 'w') as out_f:
-        out_csv = csv.writer(out_f)
-        out_csv.writerow(['Timeout-Tree (TT) analysis'])
-        out_csv.writerow([''])
-        out_csv.writerow(static_headers)
-        out_csv.writerow(['active','rollover','ave size','max size'])
-        out_csv.writerow(['period','period','of txs','of txs'])
-        out_csv.writerow(['(blocks)','(blocks)','(vbytes)','(vbytes)'])
-        out_csv.writerow(static_params)
-        out_csv.writerow([''])
-        out_csv.writerow(['Fe','Ex','Pr','Le','Va','Co','FractionTTLeaves','SecurityDelayBlocks','SecurityDelayYears','CapitalCost','CapitalEfficiency','OnchainFee','OnchainFeeFraction','ExpectedOnchainFee','ExpectedOverheadFraction'])
-        out_csv.writerow(['feerate','feerate','prob','leaves','value of all','cost of','fraction of block','delay for putting','delay for putting','capital cost','fraction of funder\'s','max fee','max fee per','expected fee per','capital cost plus'])
-        out_csv.writerow(['base','exponent','TT put','across all TTs','leaves put together','capital','space devoted to','leaves onchain','leaves onchain','per leaf','funds used by','per onchain leaf','onchain leaf as fraction','leaf','expected fee per leaf as'])
-        out_csv.writerow(['(sats/vbyte)','','onchain','','(BTC)','','leaves','(blocks)','(years)','(sats)','casual user','(sats)','of casual user\'s funds','(sats)','fraction of casual user\'s funds'])
-        for dynamic_params in in_csv:
-            analyze_tt(static_params, dynamic_params, out_csv)
-        out_csv.writerow(['Fe','Ex','Pr','Le','Va','Co','FractionTTLeaves','SecurityDelayBlocks','SecurityDelayYears','CapitalCost','CapitalEfficiency','OnchainFee','OnchainFeeFraction','ExpectedOnchainFee','ExpectedOverheadFraction'])
-        out_csv.writerow(['feerate','feerate','prob','leaves','value of all','cost of','fraction of block','delay for putting','delay for putting','capital cost','fraction of funder\'s','max fee','max fee per','expected fee per','capital cost plus'])
-        out_csv.writerow(['base','exponent','TT put','across all TTs','leaves put together','capital','space devoted to','leaves onchain','leaves onchain','per leaf','funds used by','per onchain leaf','onchain leaf as fraction','leaf','expected fee per leaf as'])
-        out_csv.writerow(['(sats/vbyte)','','onchain','','(BTC)','','leaves','(blocks)','(years)','(sats)','casual user','(sats)','of casual user\'s funds','(sats)','fraction of casual user\'s funds'])
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Analyze timeout-tree security delays and efficiency metrics')
+    parser.add_argument('-n', dest='number', action='store', default='00', help='number portion of i/o file names')
+    parser.add_argument('-j', dest='jobs', action='store', type=int, default=1, help='number of worker processes used to analyze rows')
+    args = parser.parse_args()
+    in_file_name = 'in_tt_analysis' + args.number + '.csv'
+    out_file_name = 'out_tt_analysis' + args.number + '.csv'
+    with open(in_file_name) as in_f:
+        in_csv = csv.reader(in_f)
+        static_headers = next(in_csv)
+        expected_static_headers = ['Ac','Ro','AS','MS']
+        assert expected_static_headers == static_headers
+        static_params = next(in_csv)
+        dynamic_headers = next(in_csv)
+        expected_dynamic_headers = ['Fe','Ex','Pr','Le','Va','Co']
+        assert expected_dynamic_headers == dynamic_headers
+        with open(out_file_name, 'w') as out_f:
+            out_csv = csv.writer(out_f)
+            out_csv.writerow(['Timeout-Tree (TT) analysis'])
+            out_csv.writerow([''])
+            out_csv.writerow(static_headers)
+            out_csv.writerow(['active','rollover','ave size','max size'])
+            out_csv.writerow(['period','period','of txs','of txs'])
+            out_csv.writerow(['(blocks)','(blocks)','(vbytes)','(vbytes)'])
+            out_csv.writerow(static_params)
+            out_csv.writerow([''])
+            out_csv.writerow(['Fe','Ex','Pr','Le','Va','Co','FractionTTLeaves','SecurityDelayBlocks','SecurityDelayYears','CapitalCost','CapitalEfficiency','OnchainFee','OnchainFeeFraction','ExpectedOnchainFee','ExpectedOverheadFraction'])
+            out_csv.writerow(['feerate','feerate','prob','leaves','value of all','cost of','fraction of block','delay for putting','delay for putting','capital cost','fraction of funder\'s','max fee','max fee per','expected fee per','capital cost plus'])
+            out_csv.writerow(['base','exponent','TT put','across all TTs','leaves put together','capital','space devoted to','leaves onchain','leaves onchain','per leaf','funds used by','per onchain leaf','onchain leaf as fraction','leaf','expected fee per leaf as'])
+            out_csv.writerow(['(sats/vbyte)','','onchain','','(BTC)','','leaves','(blocks)','(years)','(sats)','casual user','(sats)','of casual user\'s funds','(sats)','fraction of casual user\'s funds'])
+            if NUMPY_AVAILABLE:				# collect the remaining rows into one string array for analyze_tt_batch (extra trailing columns are ignored, as in the csv path)
+                dynamic_params_list = np.array([dynamic_params[:6] for dynamic_params in in_csv], dtype=str)
+                if len(dynamic_params_list) == 0:
+                    dynamic_params_list = dynamic_params_list.reshape(0, 6)
+                assert dynamic_params_list.ndim == 2 and dynamic_params_list.shape[1] == 6
+            else:
+                dynamic_params_list = list(in_csv)
+            if args.jobs > 1:				# split rows into one contiguous chunk per worker process, keeping them in order
+                chunk_size = max(1, -(-len(dynamic_params_list) // args.jobs))
+                chunks = [dynamic_params_list[i:i+chunk_size] for i in range(0, len(dynamic_params_list), chunk_size)]
+                with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker) as executor:
+                    rows = [row for chunk_rows in executor.map(partial(analyze_rows, static_params), chunks) for row in chunk_rows]
+            else:
+                rows = analyze_rows(static_params, dynamic_params_list)
+            write_rows(out_f, rows)
+            out_csv.writerow(['Fe','Ex','Pr','Le','Va','Co','FractionTTLeaves','SecurityDelayBlocks','SecurityDelayYears','CapitalCost','CapitalEfficiency','OnchainFee','OnchainFeeFraction','ExpectedOnchainFee','ExpectedOverheadFraction'])
+            out_csv.writerow(['feerate','feerate','prob','leaves','value of all','cost of','fraction of block','delay for putting','delay for putting','capital cost','fraction of funder\'s','max fee','max fee per','expected fee per','capital cost plus'])
+            out_csv.writerow(['base','exponent','TT put','across all TTs','leaves put together','capital','space devoted to','leaves onchain','leaves onchain','per leaf','funds used by','per onchain leaf','onchain leaf as fraction','leaf','expected fee per leaf as'])
+            out_csv.writerow(['(sats/vbyte)','','onchain','','(BTC)','','leaves','(blocks)','(years)','(sats)','casual user','(sats)','of casual user\'s funds','(sats)','fraction of casual user\'s funds'])
 